@@ -1,29 +1,56 @@
 import os
+import asyncio
 import base64
-import json
 import argparse
-import math
+import random
 import time
+import types
 import functools
+import hashlib
+import mmap
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Callable, Any, TypeVar
-from PyPDF2 import PdfReader, PdfWriter
-from mistralai import Mistral, DocumentURLChunk, ImageURLChunk, TextChunk
+import httpx
+import orjson
+from pypdf import PdfReader, PdfWriter
+from mistralai import Mistral, ImageURLChunk, TextChunk
 from mistralai.models import OCRResponse
 try:
     from mistralai.exceptions import MistralAPIException
 except ImportError:
-    class MistralAPIException(Exception):
-        def __init__(self, message=None, status_code=None):
-            self.message = message
-            self.status_code = status_code
-            super().__init__(message)
+    try:
+        # mistralai>=1.0 以 SDKError 报告HTTP错误（带 status_code 和 raw_response）
+        from mistralai.models import SDKError as MistralAPIException
+    except ImportError:
+        class MistralAPIException(Exception):
+            def __init__(self, message=None, status_code=None):
+                self.message = message
+                self.status_code = status_code
+                super().__init__(message)
+try:
+    # mistralai>=1.x 所有HTTP错误响应（SDKError、HTTPValidationError等）的基类
+    from mistralai.models import MistralError
+except ImportError:
+    MistralError = MistralAPIException
 
 # 定义一个类型变量用于装饰器
 T = TypeVar('T')
 
+# OCR结果缓存目录，按文件内容和模型名称的SHA-256索引
+CACHE_DIR = Path("~/.cache/mistral-ocr").expanduser()
+
+def _is_retryable(e):
+    """判断异常是否值得重试：429、5xx以及没有HTTP状态码的错误（如连接错误、超时）"""
+    status_code = getattr(e, 'status_code', None)
+    return not (isinstance(status_code, int) and 0 < status_code < 500 and status_code != 429)
+
 def retry_on_error(max_retries: int = 3, initial_delay: float = 1.0, backoff_factor: float = 2.0, 
-                  retry_on_exceptions=(MistralAPIException, ConnectionError)):
+                  retry_on_exceptions=(MistralAPIException, MistralError, ConnectionError, httpx.TransportError)):
     """装饰器：在遇到特定异常时自动重试函数
     
     Args:
@@ -32,14 +59,70 @@ def retry_on_error(max_retries: int = 3, initial_delay: float = 1.0, backoff_fac
         backoff_factor: 退避因子，每次重试后延迟时间会乘以这个因子
         retry_on_exceptions: 需要重试的异常类型
     
+    只重试429、5xx以及没有HTTP状态码的错误（如连接错误、超时等 httpx.TransportError），
+    其他HTTP错误（包括422 HTTPValidationError）立即抛出。
+    实际等待时间在延迟的0.5到1.5倍之间随机抖动，避免大量请求同时重试；
+    遇到429/503错误且服务器返回Retry-After时，按其指定的时间等待。
+    
     Returns:
         装饰后的函数
     """
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        def on_error(e, retry, delay):
+            """打印错误信息并返回 (等待时间, 是否来自Retry-After)，重试次数用尽时抛出异常"""
+            status_code = getattr(e, 'status_code', None)
+            # 除429外的4xx错误（如401、413）重试也不会成功，直接抛出
+            if not _is_retryable(e):
+                print(f"遇到{status_code}错误，不进行重试：{str(e)}")
+                raise e
+            
+            # 检查是否是502错误
+            if status_code == 502:
+                print(f"遇到502错误：服务器暂时不可用。正在重试...")
+            elif status_code in (429, 503):
+                print(f"遇到{status_code}错误：请求过多或服务器过载。正在重试...")
+            else:
+                print(f"遇到错误：{str(e)}。正在重试...")
+            
+            if retry >= max_retries:
+                print(f"已达到最大重试次数 ({max_retries})。操作失败。")
+                raise e
+            
+            retry_after = None
+            if status_code in (429, 503):
+                response = getattr(e, 'response', None) or getattr(e, 'raw_response', None)
+                try:
+                    retry_after = float(getattr(response, 'headers', {}).get('Retry-After'))
+                except (TypeError, ValueError):
+                    pass
+            
+            sleep = retry_after if retry_after is not None else delay
+            sleep = random.uniform(sleep * 0.5, sleep * 1.5)
+            print(f"等待 {sleep:.1f} 秒后重试...")
+            return sleep, retry_after is not None
+        
+        if asyncio.iscoroutinefunction(func):
+            # 协程函数使用 asyncio.sleep 等待，避免阻塞事件循环
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                delay = initial_delay
+                
+                for retry in range(max_retries + 1):  # +1 是因为第一次不算重试
+                    try:
+                        if retry > 0:
+                            print(f"重试 {retry}/{max_retries}...")
+                        return await func(*args, **kwargs)
+                    except retry_on_exceptions as e:
+                        sleep, from_server = on_error(e, retry, delay)
+                        await asyncio.sleep(sleep)
+                        if not from_server:
+                            delay *= backoff_factor  # 指数退避
+            
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> T:
             delay = initial_delay
-            last_exception = None
             
             for retry in range(max_retries + 1):  # +1 是因为第一次不算重试
                 try:
@@ -47,74 +130,263 @@ def retry_on_error(max_retries: int = 3, initial_delay: float = 1.0, backoff_fac
                         print(f"重试 {retry}/{max_retries}...")
                     return func(*args, **kwargs)
                 except retry_on_exceptions as e:
-                    last_exception = e
-                    # 检查是否是502错误
-                    if hasattr(e, 'status_code') and e.status_code == 502:
-                        print(f"遇到502错误：服务器暂时不可用。正在重试...")
-                    else:
-                        print(f"遇到错误：{str(e)}。正在重试...")
-                    
-                    if retry < max_retries:
-                        print(f"等待 {delay:.1f} 秒后重试...")
-                        time.sleep(delay)
+                    sleep, from_server = on_error(e, retry, delay)
+                    time.sleep(sleep)
+                    if not from_server:
                         delay *= backoff_factor  # 指数退避
-                    else:
-                        print(f"已达到最大重试次数 ({max_retries})。操作失败。")
-                        raise last_exception
+        
+        return wrapper
+    return decorator
+
+class TokenBucket:
+    """令牌桶限流器：平均每秒最多 rate 个请求，允许 capacity 个请求的突发
+    
+    线程和协程可以共享同一个实例；rate <= 0 时不限流。
+    """
+    
+    def __init__(self, rate: float, capacity: float = None):
+        self._lock = threading.Lock()
+        self.configure(rate, capacity)
+    
+    def configure(self, rate: float, capacity: float = None):
+        """设置速率和突发容量（默认容量为一秒的请求数），并重新装满令牌"""
+        with self._lock:
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else max(rate, 1)
+            self._tokens = self.capacity
+            self._updated = time.monotonic()
+    
+    def _reserve(self) -> float:
+        """取出一个令牌，返回需要等待的秒数（令牌可以透支，后来者依次排队）"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+    
+    def acquire(self):
+        """阻塞直到获得一个令牌"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+    
+    async def acquire_async(self):
+        """等待直到获得一个令牌，不阻塞事件循环"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+# 所有API调用共享的限流器，可通过 --rate-limit 调整
+API_RATE_LIMITER = TokenBucket(rate=6.0)
+
+def rate_limited(limiter: TokenBucket):
+    """装饰器：每次调用前先从限流器获取令牌，在服务器返回429之前主动节流
+    
+    放在 retry_on_error 之下，使每次重试也计入限流。
+    """
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                await limiter.acquire_async()
+                return await func(*args, **kwargs)
             
-            # 这行代码理论上不会执行，但为了类型检查添加
-            raise last_exception
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> T:
+            limiter.acquire()
+            return func(*args, **kwargs)
         
         return wrapper
     return decorator
 
+def _b64_stream(file_path, block_size=57 * 1024):
+    """Yield the base64 encoding of a file block by block.
+
+    The block size is a multiple of 3, so the encoded blocks concatenate
+    into valid base64 without padding in the middle.
+    """
+    with open(file_path, 'rb') as file:
+        while block := file.read(block_size):
+            yield base64.b64encode(block)
+
+# 常见图像格式的文件头（magic bytes）及对应的MIME类型
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+def _detect_image_mime(image_path):
+    """Detect an image's MIME type from its leading bytes, defaulting to image/jpeg."""
+    with open(image_path, 'rb') as file:
+        header = file.read(12)
+    for signature, mime in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return mime
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+def _image_data_url(image_path):
+    """Encode an image file as a base64 data URL with its detected MIME type."""
+    encoded = b"".join(_b64_stream(image_path)).decode('ascii')
+    return f"data:{_detect_image_mime(image_path)};base64,{encoded}"
+
 def read_pdf_as_base64(pdf_path):
     """Read a PDF file and encode it as base64."""
-    with open(pdf_path, 'rb') as file:
-        return base64.b64encode(file.read()).decode('utf-8')
+    return b"".join(_b64_stream(pdf_path)).decode('ascii')
 
-def get_combined_markdown(ocr_response: OCRResponse) -> str:
+def write_combined_markdown(ocr_response: OCRResponse, fh) -> None:
     """
-    Combine OCR text and images into a single markdown document.
+    Write the OCR text of all pages to a file as a single markdown document.
+
+    Pages are written one at a time, separated by blank lines, so the
+    combined document is never held in memory as one string.
 
     Args:
         ocr_response: Response from OCR processing containing text and images
-
-    Returns:
-        Combined markdown string with embedded images
+        fh: Text file handle to write the markdown to
     """
-    markdowns = []
-    # Extract images from page
-    for page in ocr_response.pages:
+    for i, page in enumerate(ocr_response.pages):
+        if i:
+            fh.write("\n\n")
         # Get markdown content from page
-        markdowns.append(page.markdown)
+        fh.write(page.markdown)
 
-    return "\n\n".join(markdowns)
+def _write_markdown_file(ocr_response, output_path):
+    """将OCR结果写入Markdown文件（供 asyncio.to_thread 在线程中调用）"""
+    with open(output_path, "w", encoding="utf-8") as md_file:
+        write_combined_markdown(ocr_response, md_file)
 
-@retry_on_error(max_retries=3, initial_delay=2.0)
-def upload_file_to_ocr_service(client, file_path):
+def _file_sha256(file_path):
+    """流式计算文件内容的SHA-256，不把整个文件读入内存
+    
+    返回hash对象，供OCR结果缓存和上传缓存共用，每次转换只读取一遍文件。
+    """
+    with open(file_path, "rb") as file:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(file, "sha256")
+        digest = hashlib.sha256()
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+        return digest
+
+def _cache_path(file_digest, model):
+    """返回OCR结果的缓存路径（不含扩展名），键为文件内容+模型名称的SHA-256
+    
+    Args:
+        file_digest: _file_sha256 返回的文件内容hash对象（不会被修改）
+        model: 使用的模型名称
+    """
+    digest = file_digest.copy()
+    digest.update(model.encode())
+    return CACHE_DIR / digest.hexdigest()
+
+def _load_cached_markdown(cache_path, output_path):
+    """缓存命中时将Markdown复制到输出路径并返回用量信息，未命中时返回None"""
+    cached_md = cache_path.with_suffix(".md")
+    if not cached_md.exists():
+        return None
+    
+    shutil.copyfile(cached_md, output_path)
+    try:
+        return orjson.loads(cache_path.with_suffix(".json").read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+def _store_cached_markdown(cache_path, markdown_path, usage):
+    """将Markdown结果及用量信息原子地写入缓存，写入失败不影响转换结果"""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with tempfile.NamedTemporaryFile("wb", dir=cache_path.parent, delete=False) as tmp:
+            tmp.write(orjson.dumps(usage or {}))
+        os.replace(tmp.name, cache_path.with_suffix(".json"))
+        
+        # .md 最后写入：它的存在即表示缓存条目完整
+        with tempfile.NamedTemporaryFile("wb", dir=cache_path.parent, delete=False) as tmp, \
+                open(markdown_path, "rb") as md_file:
+            shutil.copyfileobj(md_file, tmp)
+        os.replace(tmp.name, cache_path.with_suffix(".md"))
+    except OSError as e:
+        print(f"警告: 写入缓存失败: {str(e)}")
+
+def _print_usage_info(usage, show_size=True):
+    """打印OCR用量信息"""
+    print(f"Pages processed: {usage.get('pages_processed', 'N/A')}")
+    if show_size:
+        print(f"Document size: {usage.get('doc_size_bytes', 'N/A')} bytes")
+
+# 本次运行中已上传文件的签名URL，键为文件内容的SHA-256，值为 (签名URL, 过期时间)
+_uploaded_files = {}
+# 签名URL的有效期（小时），复用时预留一定余量，避免URL在OCR处理前过期
+SIGNED_URL_EXPIRY_HOURS = 1
+SIGNED_URL_REUSE_MARGIN = 300
+# 分块并发处理时单个API请求的默认超时（秒），可通过 --timeout 调整；
+# 需留足服务端OCR处理一个块的时间，超时的请求会被重试
+DEFAULT_CHUNK_TIMEOUT = 300
+
+def _get_uploaded_signed_url(digest):
+    """返回相同内容文件仍在有效期内的签名URL，没有时返回None"""
+    cached = _uploaded_files.get(digest)
+    if cached and time.monotonic() < cached[1]:
+        return cached[0]
+    return None
+
+def _remember_signed_url(digest, signed_url):
+    """记录已上传文件的签名URL，供重试和内容相同的文件复用"""
+    expires_at = time.monotonic() + SIGNED_URL_EXPIRY_HOURS * 3600 - SIGNED_URL_REUSE_MARGIN
+    _uploaded_files[digest] = (signed_url, expires_at)
+
+def upload_file_to_ocr_service(client, file_path, file_digest=None):
     """上传文件到Mistral OCR服务，并返回签名URL
     
+    相同内容的文件已在本次运行中上传且签名URL未过期时直接复用，
+    不发起API请求，也不占用限流令牌。
+    
     Args:
         client: Mistral客户端实例
         file_path: 文件路径对象
+        file_digest: 文件内容的hash对象（可选，未提供时计算）
         
     Returns:
         签名URL对象
     """
+    digest = (file_digest or _file_sha256(file_path)).digest()
+    signed_url = _get_uploaded_signed_url(digest)
+    if signed_url:
+        print(f"Reusing uploaded file for {file_path.name}")
+        return signed_url
+    
+    # 上传和获取签名URL是两个请求，各自占用一个限流令牌、各自重试
+    file_id = _upload_file_to_ocr_service(client, file_path)
+    signed_url = _get_signed_url(client, file_id)
+    _remember_signed_url(digest, signed_url)
+    return signed_url
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
+def _upload_file_to_ocr_service(client, file_path):
+    """上传文件并返回文件ID（带重试和限流，不查询上传缓存）"""
     print(f"Uploading {file_path.name} to Mistral AI OCR service...")
     try:
-        uploaded_file = client.files.upload(
-            file={
-                "file_name": file_path.stem,
-                "content": file_path.read_bytes(),
-            },
-            purpose="ocr",
-        )
-        
-        # 获取上传文件的URL
-        return client.files.get_signed_url(file_id=uploaded_file.id, expiry=1)
-    except MistralAPIException as e:
+        # 直接传入文件对象，由SDK流式上传，不在内存中保留整个文件
+        with open(file_path, "rb") as content:
+            uploaded_file = client.files.upload(
+                file={
+                    "file_name": file_path.stem,
+                    "content": content,
+                },
+                purpose="ocr",
+            )
+        return uploaded_file.id
+    except (MistralAPIException, MistralError) as e:
         if hasattr(e, 'status_code'):
             if e.status_code == 502:
                 print(f"Error 502: 服务器暂时不可用。这可能是由于服务器负载过高或维护。")
@@ -127,6 +399,18 @@ def upload_file_to_ocr_service(client, file_path):
         raise
 
 @retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
+def _get_signed_url(client, file_id):
+    """获取已上传文件的签名URL（带重试和限流）"""
+    return client.files.get_signed_url(file_id=file_id, expiry=SIGNED_URL_EXPIRY_HOURS)
+
+@functools.lru_cache(maxsize=None)
+def _ocr_kwargs(model):
+    """每个模型共享的OCR请求参数（只读映射，调用方以 ** 展开）"""
+    return types.MappingProxyType({"model": model, "include_image_base64": False})
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
 def process_with_ocr(client, document_url, model):
     """使用OCR处理文档
     
@@ -140,28 +424,113 @@ def process_with_ocr(client, document_url, model):
     """
     print(f"Processing document with Mistral OCR...")
     return client.ocr.process(
-        document=DocumentURLChunk(document_url=document_url),
-        model=model,
-        include_image_base64=False
+        document={"type": "document_url", "document_url": document_url},
+        **_ocr_kwargs(model)
     )
 
-def convert_pdf_to_markdown(api_key, pdf_path, output_path=None, model="mistral-ocr-latest"):
-    """Convert a PDF file to Markdown using Mistral AI OCR API."""
-    # Check if the file exists
-    if not os.path.exists(pdf_path):
+async def upload_file_to_ocr_service_async(client, file_path, file_digest=None, timeout_ms=None):
+    """异步上传文件到Mistral OCR服务，并返回签名URL
+    
+    与 upload_file_to_ocr_service 一样，缓存命中时不发起请求、不占用限流令牌。
+    
+    Args:
+        client: Mistral客户端实例
+        file_path: 文件路径对象
+        file_digest: 文件内容的hash对象（可选，未提供时计算）
+        timeout_ms: 单个请求的超时（毫秒），None表示不限制
+        
+    Returns:
+        签名URL对象
+    """
+    digest = (file_digest or await asyncio.to_thread(_file_sha256, file_path)).digest()
+    signed_url = _get_uploaded_signed_url(digest)
+    if signed_url:
+        print(f"Reusing uploaded file for {file_path.name}")
+        return signed_url
+    
+    file_id = await _upload_file_to_ocr_service_async(client, file_path, timeout_ms)
+    signed_url = await _get_signed_url_async(client, file_id, timeout_ms)
+    _remember_signed_url(digest, signed_url)
+    return signed_url
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
+async def _upload_file_to_ocr_service_async(client, file_path, timeout_ms=None):
+    """异步上传文件并返回文件ID（带重试和限流，不查询上传缓存）"""
+    print(f"Uploading {file_path.name} to Mistral AI OCR service...")
+    with open(file_path, "rb") as content:
+        uploaded_file = await client.files.upload_async(
+            file={
+                "file_name": file_path.stem,
+                "content": content,
+            },
+            purpose="ocr",
+            timeout_ms=timeout_ms,
+        )
+    return uploaded_file.id
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
+async def _get_signed_url_async(client, file_id, timeout_ms=None):
+    """异步获取已上传文件的签名URL（带重试和限流）"""
+    return await client.files.get_signed_url_async(
+        file_id=file_id, expiry=SIGNED_URL_EXPIRY_HOURS, timeout_ms=timeout_ms
+    )
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
+async def process_with_ocr_async(client, document_url, model, timeout_ms=None):
+    """异步使用OCR处理文档
+    
+    Args:
+        client: Mistral客户端实例
+        document_url: 文档URL
+        model: 使用的模型名称
+        timeout_ms: 请求超时（毫秒），None表示不限制
+        
+    Returns:
+        OCR处理结果
+    """
+    return await client.ocr.process_async(
+        document={"type": "document_url", "document_url": document_url},
+        timeout_ms=timeout_ms,
+        **_ocr_kwargs(model)
+    )
+
+def convert_pdf_to_markdown(client, pdf_path, output_path=None, model="mistral-ocr-latest", use_cache=True):
+    """Convert a PDF file to Markdown using Mistral AI OCR API.
+    
+    Results are cached under CACHE_DIR by content hash, so converting the same
+    file again with the same model does not call the API.
+    """
+    # Check if the file exists (a single stat call)
+    pdf_file = Path(pdf_path)
+    try:
+        pdf_file.stat()
+    except OSError:
         print(f"Error: File {pdf_path} does not exist.")
         return
     
     try:
-        # Initialize Mistral client with API key
-        client = Mistral(api_key=api_key)
+        # Determine output path
+        if not output_path:
+            output_path = str(pdf_file.with_suffix(".md"))
+        
+        # Hash the file once; the digest keys both the result cache and the upload cache
+        file_digest = _file_sha256(pdf_file)
         
-        # Convert path to Path object
-        pdf_file = Path(pdf_path)
+        # Reuse a cached result for identical content
+        cache_path = _cache_path(file_digest, model) if use_cache else None
+        if cache_path:
+            usage = _load_cached_markdown(cache_path, output_path)
+            if usage is not None:
+                print(f"Using cached OCR result for {pdf_file.name}. Markdown saved to {output_path}")
+                _print_usage_info(usage)
+                return output_path
         
         # 使用重试机制上传文件
         try:
-            signed_url = upload_file_to_ocr_service(client, pdf_file)
+            signed_url = upload_file_to_ocr_service(client, pdf_file, file_digest)
         except Exception as e:
             print(f"上传文件失败: {str(e)}")
             print("提示: 请检查您的网络连接和API密钥是否正确。如果问题持续存在，请联系Mistral AI支持。")
@@ -176,25 +545,20 @@ def convert_pdf_to_markdown(api_key, pdf_path, output_path=None, model="mistral-
             print("提示: 如果PDF文件很大，请考虑使用--split选项将其拆分为较小的块。")
             return None
         
-        # Get combined markdown from OCR response
-        markdown_content = get_combined_markdown(pdf_response)
-        
-        # Determine output path
-        if not output_path:
-            output_path = os.path.splitext(pdf_path)[0] + ".md"
-        
-        # Save the markdown content
+        # Save the combined markdown from the OCR response
         with open(output_path, "w", encoding="utf-8") as md_file:
-            md_file.write(markdown_content)
+            write_combined_markdown(pdf_response, md_file)
         
         print(f"Conversion successful! Markdown saved to {output_path}")
         
-        # Convert response to JSON for usage info
-        response_dict = json.loads(pdf_response.model_dump_json())
-        if "usage_info" in response_dict:
-            usage = response_dict["usage_info"]
-            print(f"Pages processed: {usage.get('pages_processed', 'N/A')}")
-            print(f"Document size: {usage.get('doc_size_bytes', 'N/A')} bytes")
+        # Read usage info straight from the response model (only this small field is dumped)
+        usage_info = getattr(pdf_response, "usage_info", None)
+        usage = usage_info.model_dump() if usage_info else {}
+        if usage:
+            _print_usage_info(usage)
+        
+        if cache_path:
+            _store_cached_markdown(cache_path, output_path, usage)
         
         return output_path
     
@@ -204,6 +568,7 @@ def convert_pdf_to_markdown(api_key, pdf_path, output_path=None, model="mistral-
         return None
 
 @retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
 def process_image_with_ocr(client, image_url, model):
     """使用OCR处理图像
     
@@ -221,24 +586,36 @@ def process_image_with_ocr(client, image_url, model):
         model=model
     )
 
-def convert_image_to_markdown(api_key, image_path, output_path=None, model="mistral-ocr-latest"):
-    """Convert an image file to Markdown using Mistral AI OCR API."""
-    # Check if the file exists
-    if not os.path.exists(image_path):
+def convert_image_to_markdown(client, image_path, output_path=None, model="mistral-ocr-latest", use_cache=True):
+    """Convert an image file to Markdown using Mistral AI OCR API.
+    
+    Results are cached the same way as in convert_pdf_to_markdown.
+    """
+    # Check if the file exists (a single stat call)
+    image_file = Path(image_path)
+    try:
+        image_file.stat()
+    except OSError:
         print(f"Error: File {image_path} does not exist.")
         return
     
     try:
-        # Initialize Mistral client with API key
-        client = Mistral(api_key=api_key)
+        # Determine output path
+        if not output_path:
+            output_path = str(image_file.with_suffix(".md"))
         
-        # Convert path to Path object
-        image_file = Path(image_path)
+        # Reuse a cached result for identical content
+        cache_path = _cache_path(_file_sha256(image_file), model) if use_cache else None
+        if cache_path:
+            usage = _load_cached_markdown(cache_path, output_path)
+            if usage is not None:
+                print(f"Using cached OCR result for {image_file.name}. Markdown saved to {output_path}")
+                _print_usage_info(usage, show_size=False)
+                return output_path
         
         # Read and encode the image file
         print(f"Processing {image_file.name} with Mistral OCR...")
-        encoded = base64.b64encode(image_file.read_bytes()).decode()
-        base64_data_url = f"data:image/jpeg;base64,{encoded}"
+        base64_data_url = _image_data_url(image_file)
         
         # 使用重试机制处理图像
         try:
@@ -248,24 +625,20 @@ def convert_image_to_markdown(api_key, image_path, output_path=None, model="mist
             print("提示: 请检查图像格式是否支持，或尝试转换为其他格式。")
             return None
         
-        # Get combined markdown from OCR response
-        markdown_content = get_combined_markdown(image_response)
-        
-        # Determine output path
-        if not output_path:
-            output_path = os.path.splitext(image_path)[0] + ".md"
-        
-        # Save the markdown content
+        # Save the combined markdown from the OCR response
         with open(output_path, "w", encoding="utf-8") as md_file:
-            md_file.write(markdown_content)
+            write_combined_markdown(image_response, md_file)
         
         print(f"Conversion successful! Markdown saved to {output_path}")
         
-        # Convert response to JSON for usage info
-        response_dict = json.loads(image_response.model_dump_json())
-        if "usage_info" in response_dict:
-            usage = response_dict["usage_info"]
-            print(f"Pages processed: {usage.get('pages_processed', 'N/A')}")
+        # Read usage info straight from the response model (only this small field is dumped)
+        usage_info = getattr(image_response, "usage_info", None)
+        usage = usage_info.model_dump() if usage_info else {}
+        if usage:
+            _print_usage_info(usage, show_size=False)
+        
+        if cache_path:
+            _store_cached_markdown(cache_path, output_path, usage)
         
         return output_path
     
@@ -274,55 +647,134 @@ def convert_image_to_markdown(api_key, image_path, output_path=None, model="mist
         print("如果您遇到网络问题或服务器错误，请稍后再试。")
         return None
 
-def split_pdf(pdf_path, output_dir=None, num_chunks=100):
-    """Split a PDF file into multiple smaller PDF files."""
+# 子进程内缓存已解析的PdfReader，同一进程写多个块时只解析一次源PDF
+_pdf_readers = {}
+
+def _write_chunk(pdf_path, start_page, end_page, output_path):
+    """Write pages [start_page, end_page) of a PDF to output_path.
+
+    Runs in a worker process; PdfReader objects are not picklable, so each
+    worker opens the source PDF itself.
+    """
+    pdf = _pdf_readers.get(pdf_path)
+    if pdf is None:
+        pdf = _pdf_readers[pdf_path] = PdfReader(pdf_path)
+    
+    # Create a new PDF writer
+    pdf_writer = PdfWriter()
+    
+    # Add pages to the writer
+    for page_num in range(start_page, end_page):
+        pdf_writer.add_page(pdf.pages[page_num])
+    
+    # Save the chunk
+    with open(output_path, "wb") as output_file:
+        pdf_writer.write(output_file)
+    
+    return output_path
+
+def _split_pdf_with_qpdf(qpdf, pdf_path, pages_per_chunk, output_paths):
+    """Split a PDF with qpdf and move the parts to output_paths in page order."""
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_paths[0])) as tmp_dir:
+        # qpdf 将 %d 替换为补零的页码范围（如 01-05），按文件名排序即为页码顺序
+        result = subprocess.run(
+            [qpdf, pdf_path, f"--split-pages={pages_per_chunk}", os.path.join(tmp_dir, "chunk_%d.pdf")],
+            capture_output=True, text=True,
+        )
+        # 退出码3表示成功但有警告
+        if result.returncode not in (0, 3):
+            raise RuntimeError(f"qpdf failed: {result.stderr.strip()}")
+        
+        parts = sorted(os.listdir(tmp_dir))
+        if len(parts) != len(output_paths):
+            raise RuntimeError(f"qpdf produced {len(parts)} chunks, expected {len(output_paths)}")
+        
+        for part, output_path in zip(parts, output_paths):
+            os.replace(os.path.join(tmp_dir, part), output_path)
+    
+    return output_paths
+
+def split_pdf(pdf_path, output_dir=None, num_chunks=100, max_workers=None):
+    """Split a PDF file into multiple smaller PDF files.
+    
+    This is a generator yielding each chunk path in page order. Uses qpdf
+    when it is installed: qpdf splits the whole file in one fast pass, and the
+    chunk paths are yielded only after it finishes. Otherwise the chunks are
+    written with pypdf in parallel processes, and each path is yielded as soon
+    as its chunk has been written, so callers can start processing early
+    chunks while later ones are still being split.
+    """
     # Create output directory if it doesn't exist
     if not output_dir:
         output_dir = os.path.join(os.path.dirname(pdf_path), "split_pdfs")
     
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
     
     # Get the base filename without extension
-    base_filename = os.path.splitext(os.path.basename(pdf_path))[0]
+    base_filename = Path(pdf_path).stem
     
-    # Read the PDF
-    pdf = PdfReader(pdf_path)
-    total_pages = len(pdf.pages)
+    # Count the pages
+    qpdf = shutil.which("qpdf")
+    total_pages = None
+    reader = None
+    if qpdf:
+        try:
+            total_pages = int(subprocess.run(
+                [qpdf, "--show-npages", pdf_path], capture_output=True, text=True, check=True
+            ).stdout)
+        except (OSError, ValueError, subprocess.CalledProcessError):
+            qpdf = None
+    if total_pages is None:
+        reader = PdfReader(pdf_path)
+        total_pages = len(reader.pages)
     
-    # Calculate pages per chunk (at least 1 page per chunk)
-    pages_per_chunk = max(1, math.ceil(total_pages / num_chunks))
+    if total_pages == 0:
+        raise ValueError(f"{pdf_path} 没有任何页面")
+    
+    # Calculate pages per chunk (at least 1 page per chunk), using integer ceiling division
+    pages_per_chunk = max(1, -(-total_pages // num_chunks))
     
     # Calculate actual number of chunks needed
-    actual_chunks = math.ceil(total_pages / pages_per_chunk)
+    actual_chunks = -(-total_pages // pages_per_chunk)
     
     print(f"Splitting {pdf_path} into {actual_chunks} chunks with approximately {pages_per_chunk} pages per chunk...")
     
-    chunk_paths = []
+    start_pages = [i * pages_per_chunk for i in range(actual_chunks)]
+    end_pages = [min((i + 1) * pages_per_chunk, total_pages) for i in range(actual_chunks)]
+    output_paths = [os.path.join(output_dir, f"{base_filename}_chunk_{i+1:03d}.pdf") for i in range(actual_chunks)]
     
-    # Split the PDF into chunks
-    for i in range(actual_chunks):
-        start_page = i * pages_per_chunk
-        end_page = min((i + 1) * pages_per_chunk, total_pages)
-        
-        # Create a new PDF writer
-        pdf_writer = PdfWriter()
-        
-        # Add pages to the writer
-        for page_num in range(start_page, end_page):
-            pdf_writer.add_page(pdf.pages[page_num])
-        
-        # Save the chunk
-        output_path = os.path.join(output_dir, f"{base_filename}_chunk_{i+1:03d}.pdf")
-        with open(output_path, "wb") as output_file:
-            pdf_writer.write(output_file)
-        
-        chunk_paths.append(output_path)
-        
-    print(f"Successfully split PDF into {len(chunk_paths)} chunks in {output_dir}")
-    return chunk_paths
+    chunk_paths = None
+    if qpdf:
+        try:
+            chunk_paths = _split_pdf_with_qpdf(qpdf, pdf_path, pages_per_chunk, output_paths)
+        except (OSError, RuntimeError) as e:
+            print(f"qpdf拆分失败，改用pypdf: {str(e)}")
+    
+    if chunk_paths is not None:
+        yield from chunk_paths
+    else:
+        # Split the PDF with pypdf; writing each chunk is CPU-bound, so use processes
+        workers = min(max_workers or os.cpu_count() or 1, actual_chunks)
+        if workers <= 1:
+            try:
+                # 复用统计页数时已解析的reader，避免再解析一次
+                if reader is not None:
+                    _pdf_readers[pdf_path] = reader
+                for start, end, output in zip(start_pages, end_pages, output_paths):
+                    yield _write_chunk(pdf_path, start, end, output)
+            finally:
+                _pdf_readers.pop(pdf_path, None)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # map 按顺序产出结果，每个块写完即可交给调用方
+                yield from executor.map(
+                    _write_chunk, [pdf_path] * actual_chunks, start_pages, end_pages, output_paths
+                )
+    
+    print(f"Successfully split PDF into {actual_chunks} chunks in {output_dir}")
 
 @retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
 def chat_complete_with_retry(client, model, messages, response_format=None, temperature=0):
     """使用重试机制调用聊天完成API
     
@@ -344,25 +796,28 @@ def chat_complete_with_retry(client, model, messages, response_format=None, temp
         temperature=temperature,
     )
 
-def extract_structured_data(api_key, file_path, model="pixtral-12b-latest", output_path=None):
-    """Extract structured data from OCR results using a model."""
-    # Check if the file exists
-    if not os.path.exists(file_path):
+def extract_structured_data(client, file_path, model="pixtral-12b-latest", output_path=None, use_cache=True):
+    """Extract structured data from OCR results using a model.
+    
+    For PDFs, markdown cached by an earlier OCR of the same content is used
+    directly, so repeated extractions only call the chat model.
+    """
+    # Check if the file exists (a single stat call)
+    input_file = Path(file_path)
+    try:
+        input_file.stat()
+    except OSError:
         print(f"Error: File {file_path} does not exist.")
         return
     
     try:
-        # Initialize Mistral client with API key
-        client = Mistral(api_key=api_key)
-        
         # Check if the file is an image or a PDF
-        file_ext = os.path.splitext(file_path)[1].lower()
+        file_ext = input_file.suffix.lower()
         
         if file_ext in [".jpg", ".jpeg", ".png"]:
             # Process image
-            image_file = Path(file_path)
-            encoded = base64.b64encode(image_file.read_bytes()).decode()
-            base64_data_url = f"data:image/jpeg;base64,{encoded}"
+            image_file = input_file
+            base64_data_url = _image_data_url(image_file)
             
             # 使用重试机制处理图像
             try:
@@ -399,15 +854,16 @@ def extract_structured_data(api_key, file_path, model="pixtral-12b-latest", outp
                 )
                 
                 # Parse JSON response
-                structured_data = json.loads(chat_response.choices[0].message.content)
+                structured_data = orjson.loads(chat_response.choices[0].message.content)
             except Exception as e:
                 print(f"提取结构化数据失败: {str(e)}")
                 print("提示: 请检查模型是否可用，或尝试使用不同的模型。")
                 return None
             
         elif file_ext == ".pdf":
-            # For PDF, first convert to markdown, then process
-            md_path = convert_pdf_to_markdown(api_key, file_path)
+            # For PDF, first convert to markdown, then process.
+            # A cached OCR result for this content is reused by convert_pdf_to_markdown without calling the API.
+            md_path = convert_pdf_to_markdown(client, file_path, use_cache=use_cache)
             
             if not md_path:
                 print("Error: Failed to convert PDF to markdown.")
@@ -441,7 +897,7 @@ def extract_structured_data(api_key, file_path, model="pixtral-12b-latest", outp
                 )
                 
                 # Parse JSON response
-                structured_data = json.loads(chat_response.choices[0].message.content)
+                structured_data = orjson.loads(chat_response.choices[0].message.content)
             except Exception as e:
                 print(f"提取结构化数据失败: {str(e)}")
                 print("提示: 请检查模型是否可用，或尝试使用不同的模型。")
@@ -452,12 +908,12 @@ def extract_structured_data(api_key, file_path, model="pixtral-12b-latest", outp
         
         # Save structured data to file if output path is provided
         if output_path:
-            with open(output_path, "w", encoding="utf-8") as json_file:
-                json.dump(structured_data, json_file, indent=4)
+            with open(output_path, "wb") as json_file:
+                json_file.write(orjson.dumps(structured_data, option=orjson.OPT_INDENT_2))
             print(f"Structured data saved to {output_path}")
         else:
             # Print structured data
-            print(json.dumps(structured_data, indent=4))
+            print(orjson.dumps(structured_data, option=orjson.OPT_INDENT_2).decode())
         
         return structured_data
     
@@ -466,63 +922,330 @@ def extract_structured_data(api_key, file_path, model="pixtral-12b-latest", outp
         print("如果您遇到网络问题或服务器错误，请稍后再试。")
         return None
 
-def process_pdf_in_chunks(api_key, pdf_path, output_path=None, num_chunks=100, model="mistral-ocr-latest"):
-    """Process a large PDF by splitting it into chunks and processing each chunk."""
+def _prefetch_files(paths):
+    """Ask the kernel to start reading all of paths ahead of use.
+
+    posix_fadvise(WILLNEED) queues asynchronous readahead for every file up
+    front, so reads on slow or network storage overlap instead of being paid
+    one file at a time. A no-op where posix_fadvise is unavailable.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+def _append_file(out_file, src_path):
+    """Append the bytes of src_path to the binary file object out_file.
+
+    Uses sendfile(2) so the data is copied inside the kernel; platforms that
+    cannot sendfile between regular files (e.g. macOS) memory-map the source
+    and write the mapped bytes directly. Either way no text decoding or
+    re-encoding takes place.
+    """
+    with open(src_path, "rb") as src:
+        size = os.fstat(src.fileno()).st_size
+        offset = 0
+        out_file.flush()
+        try:
+            while offset < size:
+                sent = os.sendfile(out_file.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except (AttributeError, OSError):
+            if offset < size:
+                with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                        memoryview(mm) as view, view[offset:] as rest:
+                    out_file.write(rest)
+
+async def _convert_chunk_async(client, semaphore, index, chunk_path, chunk_output_path, model, use_cache=True, timeout_ms=None):
+    """在并发限制内处理单个PDF块，成功时返回输出路径，失败时返回None"""
+    chunk_file = Path(chunk_path)
+    max_chunk_retries = 2
+    
+    # Hash the chunk once; the digest keys both the result cache and the upload cache
+    file_digest = await asyncio.to_thread(_file_sha256, chunk_file)
+    
+    # Reuse a cached result for identical content
+    cache_path = _cache_path(file_digest, model) if use_cache else None
+    if cache_path and await asyncio.to_thread(_load_cached_markdown, cache_path, chunk_output_path) is not None:
+        print(f"Using cached OCR result for chunk {index+1}: {chunk_file.name}")
+        return chunk_output_path
+    
+    async with semaphore:
+        print(f"Processing chunk {index+1}: {chunk_file.name}")
+        for retry in range(max_chunk_retries + 1):
+            try:
+                signed_url = await upload_file_to_ocr_service_async(client, chunk_file, file_digest, timeout_ms)
+                pdf_response = await process_with_ocr_async(client, signed_url.url, model, timeout_ms)
+                
+                # 写文件放到线程中，避免阻塞事件循环上其他块的请求
+                await asyncio.to_thread(_write_markdown_file, pdf_response, chunk_output_path)
+                
+                print(f"Chunk {index+1} saved to {chunk_output_path}")
+                break
+            except Exception as e:
+                if retry < max_chunk_retries and _is_retryable(e):
+                    print(f"处理块 {index+1} 时出错: {str(e)}，正在重试 ({retry+1}/{max_chunk_retries})...")
+                    await asyncio.sleep(2 * (retry + 1))  # 增加延迟
+                else:
+                    print(f"处理块 {index+1} 失败，跳过此块: {str(e)}")
+                    return None
+    
+    if cache_path:
+        await asyncio.to_thread(_store_cached_markdown, cache_path, chunk_output_path, {})
+    return chunk_output_path
+
+async def _convert_chunks_async(client, chunk_paths, chunk_output_path_for, model, concurrency, use_cache=True, timeout_ms=None):
+    """流水线处理PDF块：每拆分出一个块就立即提交OCR，拆分与OCR并行进行
+    
+    Args:
+        client: Mistral客户端实例
+        chunk_paths: 块路径的可迭代对象（可以是仍在拆分中的生成器）
+        chunk_output_path_for: 根据块路径返回其Markdown输出路径的函数
+        model: 使用的模型名称
+        concurrency: 同时进行的OCR请求数上限
+        use_cache: 是否使用OCR结果缓存
+        timeout_ms: 每个API请求的超时（毫秒），None表示不限制
+        
+    Returns:
+        按块顺序排列的输出路径列表，失败的块为None
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    chunk_iter = iter(chunk_paths)
+    tasks = []
+    try:
+        # 在线程中推进拆分生成器，事件循环同时处理已提交的OCR任务
+        while (chunk_path := await asyncio.to_thread(next, chunk_iter, None)) is not None:
+            tasks.append(asyncio.create_task(_convert_chunk_async(
+                client, semaphore, len(tasks), chunk_path, chunk_output_path_for(chunk_path), model, use_cache, timeout_ms
+            )))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    
+    return await asyncio.gather(*tasks)
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
+def upload_file_for_batch(client, file_path):
+    """上传文件到Mistral OCR服务，并返回文件ID（供批量任务直接引用）
+    
+    Args:
+        client: Mistral客户端实例
+        file_path: 文件路径对象
+        
+    Returns:
+        上传文件的ID
+    """
+    print(f"Uploading {file_path.name} to Mistral AI OCR service...")
+    with open(file_path, "rb") as content:
+        return client.files.upload(
+            file={
+                "file_name": file_path.stem,
+                "content": content,
+            },
+            purpose="ocr",
+        ).id
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
+def submit_batch(client, file_ids, model):
+    """提交批量OCR任务，每个文件ID对应一个请求，custom_id为文件在列表中的序号
+    
+    Args:
+        client: Mistral客户端实例
+        file_ids: 已上传文件的ID列表
+        model: 使用的模型名称
+        
+    Returns:
+        批量任务对象
+    """
+    print(f"Submitting batch OCR job with {len(file_ids)} documents...")
+    return client.batch.jobs.create(
+        endpoint="/v1/ocr",
+        model=model,
+        requests=[
+            {
+                "custom_id": str(i),
+                "body": {
+                    "document": {"type": "file", "file_id": file_id},
+                    **_ocr_kwargs(model),
+                },
+            }
+            for i, file_id in enumerate(file_ids)
+        ],
+    )
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+def get_batch_job(client, job_id):
+    """获取批量任务的当前状态"""
+    return client.batch.jobs.get(job_id=job_id)
+
+def wait_for_batch(client, job_id, initial_interval=5.0, max_interval=60.0):
+    """轮询批量任务直到结束，轮询间隔按指数增长
+    
+    Args:
+        client: Mistral客户端实例
+        job_id: 批量任务ID
+        initial_interval: 初始轮询间隔（秒）
+        max_interval: 最大轮询间隔（秒）
+        
+    Returns:
+        结束状态的批量任务对象
+    """
+    interval = initial_interval
+    while True:
+        job = get_batch_job(client, job_id)
+        if job.status not in ("QUEUED", "RUNNING", "CANCELLATION_REQUESTED"):
+            return job
+        print(f"Batch job {job_id}: {job.status} ({job.completed_requests}/{job.total_requests})，{interval:.0f} 秒后再次检查...")
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+@retry_on_error(max_retries=3, initial_delay=2.0)
+@rate_limited(API_RATE_LIMITER)
+def download_batch_file(client, file_id):
+    """下载批量任务的结果或错误文件（JSONL）
+    
+    Args:
+        client: Mistral客户端实例
+        file_id: 结果文件或错误文件的ID
+        
+    Returns:
+        文件中的非空行列表
+    """
+    response = client.files.download(file_id=file_id)
+    try:
+        return [line for line in response.iter_lines() if line.strip()]
+    finally:
+        response.close()
+
+def _convert_chunks_batch(client, chunk_paths, chunk_output_paths, model):
+    """通过批量API一次性处理所有PDF块：上传全部块 → 提交任务 → 轮询 → 按custom_id拆分结果"""
+    results = [None] * len(chunk_paths)
+    
+    try:
+        file_ids = [upload_file_for_batch(client, Path(chunk_path)) for chunk_path in chunk_paths]
+        job = wait_for_batch(client, submit_batch(client, file_ids, model).id)
+        
+        # 失败的请求只出现在错误文件中，不会出现在结果文件中
+        error_lines = download_batch_file(client, job.error_file) if job.error_file else []
+        
+        if not job.output_file:
+            print(f"批量任务没有产生结果，状态: {job.status}")
+        output_lines = download_batch_file(client, job.output_file) if job.output_file else []
+    except Exception as e:
+        print(f"批量任务失败: {str(e)}")
+        return results
+    
+    for line in error_lines:
+        try:
+            entry = orjson.loads(line)
+            chunk_name = os.path.basename(chunk_paths[int(entry["custom_id"])])
+            print(f"处理块 {chunk_name} 失败，跳过此块: {entry.get('error') or entry.get('response')}")
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print(f"无法解析批量错误信息，跳过: {str(e)}")
+    
+    for line in output_lines:
+        try:
+            entry = orjson.loads(line)
+            index = int(entry["custom_id"])
+            ocr_response = OCRResponse.model_validate(entry["response"]["body"])
+            with open(chunk_output_paths[index], "w", encoding="utf-8") as md_file:
+                write_combined_markdown(ocr_response, md_file)
+            results[index] = chunk_output_paths[index]
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print(f"无法解析批量结果，跳过: {str(e)}")
+    
+    return results
+
+def _convert_chunks_batch_cached(client, chunk_paths, chunk_output_path_for, model, use_cache=True):
+    """先从缓存中取出已处理过的块，其余块通过批量任务处理并写入缓存"""
+    chunk_output_paths = [chunk_output_path_for(chunk_path) for chunk_path in chunk_paths]
+    results = [None] * len(chunk_paths)
+    cache_paths = [_cache_path(_file_sha256(chunk_path), model) if use_cache else None for chunk_path in chunk_paths]
+    for i, cache_path in enumerate(cache_paths):
+        if cache_path and _load_cached_markdown(cache_path, chunk_output_paths[i]) is not None:
+            results[i] = chunk_output_paths[i]
+    
+    pending = [i for i, result in enumerate(results) if not result]
+    if len(pending) < len(chunk_paths):
+        print(f"Using cached OCR results for {len(chunk_paths) - len(pending)} chunks")
+    if not pending:
+        return results
+    
+    pending_results = _convert_chunks_batch(
+        client, [chunk_paths[i] for i in pending], [chunk_output_paths[i] for i in pending], model
+    )
+    for i, result in zip(pending, pending_results):
+        results[i] = result
+        if result and cache_paths[i]:
+            _store_cached_markdown(cache_paths[i], result, {})
+    
+    return results
+
+def process_pdf_in_chunks(client, pdf_path, output_path=None, num_chunks=100, model="mistral-ocr-latest", concurrency=4, batch=False, use_cache=True, timeout=DEFAULT_CHUNK_TIMEOUT):
+    """Process a large PDF by splitting it into chunks and processing the chunks concurrently.
+    
+    OCR of each chunk starts as soon as it has been split. With batch=True all
+    chunks are submitted as a single Mistral batch job instead. `timeout` is
+    the per-request timeout in seconds for concurrent processing (0 or None
+    disables it).
+    """
+    # Generate output paths for the chunks
+    chunk_output_dir = None
+    if output_path:
+        chunk_output_dir = os.path.join(os.path.dirname(output_path), "chunk_outputs")
+        os.makedirs(chunk_output_dir, exist_ok=True)
+    
+    def chunk_output_path_for(chunk_path):
+        chunk_file = Path(chunk_path)
+        if chunk_output_dir:
+            return os.path.join(chunk_output_dir, f"{chunk_file.stem}.md")
+        return str(chunk_file.with_suffix(".md"))
+    
     # Split the PDF into chunks
     try:
-        chunk_paths = split_pdf(pdf_path, num_chunks=num_chunks)
+        if batch:
+            # The batch job needs every chunk, so wait for splitting to finish
+            chunk_paths = list(split_pdf(pdf_path, num_chunks=num_chunks))
+        else:
+            # Start OCR on each chunk as soon as it is split, at most `concurrency` requests in flight
+            print(f"Processing chunks with concurrency {concurrency}...")
+            timeout_ms = int(timeout * 1000) if timeout and timeout > 0 else None
+            results = asyncio.run(_convert_chunks_async(
+                client, split_pdf(pdf_path, num_chunks=num_chunks), chunk_output_path_for, model, max(1, concurrency), use_cache, timeout_ms
+            ))
     except Exception as e:
         print(f"拆分PDF失败: {str(e)}")
         print("提示: 请确保PDF文件未损坏且可读取。")
         return None
     
-    # Process each chunk
-    chunk_outputs = []
-    failed_chunks = []
+    if batch:
+        # Submit all chunks as one batch job
+        results = _convert_chunks_batch_cached(client, chunk_paths, chunk_output_path_for, model, use_cache)
     
-    for i, chunk_path in enumerate(chunk_paths):
-        print(f"Processing chunk {i+1}/{len(chunk_paths)}: {os.path.basename(chunk_path)}")
-        
-        # Generate output path for this chunk if not provided
-        chunk_output_path = None
-        if output_path:
-            chunk_output_dir = os.path.join(os.path.dirname(output_path), "chunk_outputs")
-            if not os.path.exists(chunk_output_dir):
-                os.makedirs(chunk_output_dir)
-            chunk_output_path = os.path.join(chunk_output_dir, f"{os.path.splitext(os.path.basename(chunk_path))[0]}.md")
-        
-        # Process the chunk with retry
-        max_chunk_retries = 2
-        for retry in range(max_chunk_retries + 1):
-            try:
-                # Process the chunk
-                result_path = convert_pdf_to_markdown(api_key, chunk_path, chunk_output_path, model)
-                if result_path:
-                    chunk_outputs.append(result_path)
-                    break
-                else:
-                    if retry < max_chunk_retries:
-                        print(f"处理块 {i+1} 失败，正在重试 ({retry+1}/{max_chunk_retries})...")
-                        time.sleep(2 * (retry + 1))  # 增加延迟
-                    else:
-                        print(f"处理块 {i+1} 失败，跳过此块。")
-                        failed_chunks.append(i+1)
-            except Exception as e:
-                if retry < max_chunk_retries:
-                    print(f"处理块 {i+1} 时出错: {str(e)}，正在重试 ({retry+1}/{max_chunk_retries})...")
-                    time.sleep(2 * (retry + 1))  # 增加延迟
-                else:
-                    print(f"处理块 {i+1} 失败，跳过此块: {str(e)}")
-                    failed_chunks.append(i+1)
+    chunk_outputs = [result for result in results if result]
+    failed_chunks = [i + 1 for i, result in enumerate(results) if not result]
     
     # Combine all chunk outputs into a single file if output_path is provided
     if output_path and chunk_outputs:
         print(f"Combining {len(chunk_outputs)} chunk outputs into {output_path}...")
-        with open(output_path, "w", encoding="utf-8") as combined_file:
+        _prefetch_files(chunk_outputs)
+        with open(output_path, "wb") as combined_file:
             for chunk_output in chunk_outputs:
-                with open(chunk_output, "r", encoding="utf-8") as chunk_file:
-                    combined_file.write(chunk_file.read())
-                    combined_file.write("\n\n")
+                _append_file(combined_file, chunk_output)
+                combined_file.write(b"\n\n")
         
         print(f"Successfully combined all chunks into {output_path}")
         
@@ -552,9 +1275,14 @@ def main():
     parser.add_argument("--api-key", "-k", help="Mistral AI API key")
     parser.add_argument("--split", "-s", action="store_true", help="Split large PDF into chunks before processing")
     parser.add_argument("--chunks", "-c", type=int, default=100, help="Number of chunks to split the PDF into (default: 100)")
+    parser.add_argument("--concurrency", "-p", type=int, default=4, help="Number of chunks processed concurrently with --split (default: 4)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_CHUNK_TIMEOUT, help=f"Per-request timeout in seconds for concurrent chunk processing with --split, 0 to disable (default: {DEFAULT_CHUNK_TIMEOUT})")
+    parser.add_argument("--batch", "-b", action="store_true", help="Submit all chunks as a single batch job with --split (cheaper, but results may take longer)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the local OCR result cache (~/.cache/mistral-ocr)")
     parser.add_argument("--model", "-m", default="mistral-ocr-latest", help="Mistral OCR model to use (default: mistral-ocr-latest)")
     parser.add_argument("--structured", "-j", action="store_true", help="Extract structured data from OCR results")
     parser.add_argument("--structured-model", "-sm", default="pixtral-12b-latest", help="Model to use for structured data extraction (default: pixtral-12b-latest)")
+    parser.add_argument("--rate-limit", type=float, default=6.0, help="Maximum API requests per second, 0 to disable (default: 6)")
     parser.add_argument("--max-retries", "-r", type=int, default=3, help="Maximum number of retries for API calls (default: 3)")
     parser.add_argument("--retry-delay", "-d", type=float, default=2.0, help="Initial delay between retries in seconds (default: 2.0)")
     
@@ -567,21 +1295,30 @@ def main():
         print("Error: Mistral AI API key is required. Provide it with --api-key or set the MISTRAL_API_KEY environment variable.")
         return
     
-    # 检查文件是否存在
-    if not os.path.exists(args.file_path):
+    # 检查文件是否存在（只调用一次stat）
+    input_file = Path(args.file_path)
+    try:
+        input_file.stat()
+    except OSError:
         print(f"Error: File {args.file_path} does not exist.")
         return
     
     # 检查文件扩展名
-    file_ext = os.path.splitext(args.file_path)[1].lower()
+    file_ext = input_file.suffix.lower()
     
     # 确定输出路径（如果未提供）
     output_path = args.output
     if not output_path:
         if args.structured:
-            output_path = os.path.splitext(args.file_path)[0] + ".json"
+            output_path = str(input_file.with_suffix(".json"))
         else:
-            output_path = os.path.splitext(args.file_path)[0] + ".md"
+            output_path = str(input_file.with_suffix(".md"))
+    
+    # 按账户的速率限制主动节流
+    API_RATE_LIMITER.configure(args.rate_limit)
+    
+    # 只创建一个客户端，所有API调用复用其连接
+    client = Mistral(api_key=api_key)
     
     # 根据文件类型和选项处理文件
     try:
@@ -589,18 +1326,18 @@ def main():
         if file_ext == ".pdf":
             print(f"处理PDF文件: {args.file_path}")
             if args.structured:
-                result = extract_structured_data(api_key, args.file_path, args.structured_model, output_path)
+                result = extract_structured_data(client, args.file_path, args.structured_model, output_path, not args.no_cache)
             elif args.split:
                 print(f"将PDF拆分为最多{args.chunks}个块进行处理...")
-                result = process_pdf_in_chunks(api_key, args.file_path, output_path, args.chunks, args.model)
+                result = process_pdf_in_chunks(client, args.file_path, output_path, args.chunks, args.model, args.concurrency, args.batch, not args.no_cache, args.timeout)
             else:
-                result = convert_pdf_to_markdown(api_key, args.file_path, output_path, args.model)
+                result = convert_pdf_to_markdown(client, args.file_path, output_path, args.model, not args.no_cache)
         elif file_ext in [".jpg", ".jpeg", ".png"]:
             print(f"处理图像文件: {args.file_path}")
             if args.structured:
-                result = extract_structured_data(api_key, args.file_path, args.structured_model, output_path)
+                result = extract_structured_data(client, args.file_path, args.structured_model, output_path, not args.no_cache)
             else:
-                result = convert_image_to_markdown(api_key, args.file_path, output_path, args.model)
+                result = convert_image_to_markdown(client, args.file_path, output_path, args.model, not args.no_cache)
         else:
             print(f"Error: 不支持的文件格式: {file_ext}")
             print("支持的格式: .pdf, .jpg, .jpeg, .png")